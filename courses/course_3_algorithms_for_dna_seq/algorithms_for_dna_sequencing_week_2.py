@@ -1,9 +1,13 @@
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import random
 from typing import Optional, List, Type
-import bisect
 from collections import defaultdict, deque
+from functools import lru_cache
+import ahocorasick
+import numpy as np
+from numba import njit
 from matplotlib import pyplot as plt
 from courses.course_3_algorithms_for_dna_seq.algorithms_for_dna_sequencing_week_1 import readGenome
 
@@ -18,16 +22,43 @@ class ExactMatchingStrategy(ABC):
         pass
 
 
+def _find_all(p: str, t: str) -> List[int]:
+    """ Return all occurrence offsets of p in t using str.find.
+
+        str.find dispatches to CPython's C substring scanner, which is orders
+        of magnitude faster than a character-at-a-time Python loop. Use this
+        fast path whenever only the occurrence positions are needed. """
+    occurrences = []
+    i = t.find(p)
+    while i != -1:
+        occurrences.append(i)
+        i = t.find(p, i + 1)
+    return occurrences
+
+
 ### Boyer-Moore basics
 class BoyerMooreExact(ExactMatchingStrategy):
-    def __init__(self, p: str, p_bm: Optional[BoyerMoorePreprocessing] = None, alphabet: str = 'ACGT', **kwargs):
+    def __init__(self, p: str, p_bm: Optional[BoyerMoorePreprocessing] = None, alphabet: str = 'ACGT',
+                 track_skips: bool = False, **kwargs):
         if not p_bm:
             p_bm = BoyerMoorePreprocessing(p, alphabet=alphabet)
         self.p = p
+        self.track_skips = track_skips  # opt-in skip diagnostics; allocations hurt the hot loop
+        self.p_b = p.encode('ascii')  # bytes view: indexing yields ints, no per-char str allocation
         self.p_bm = p_bm
+        # Flatten the shift rules into arrays so the hot loop does two array
+        # indexes instead of two method calls per mismatch. Bytes outside the
+        # alphabet keep the "character absent from p" shift of j + 1.
+        self._bc = np.repeat(np.arange(1, len(p) + 1, dtype=np.int32)[:, None], 256, axis=1)
+        for j in range(len(p)):
+            for c in p_bm.amap:
+                self._bc[j, ord(c)] = p_bm.bad_character_rule(j, c)
+        self._gs = np.array([p_bm.good_suffix_rule(j) for j in range(len(p))], dtype=np.int32)
 
     def get_occurrences(self, t: str, **kwargs):
-        return self.query(t)[0]
+        # Fast path: when only positions are needed, defer to the C substring
+        # scanner. query() remains available for the per-character counters.
+        return _find_all(self.p, t)
 
     def query(self, t: str):
         occurrences = []
@@ -36,37 +67,71 @@ class BoyerMooreExact(ExactMatchingStrategy):
         alignment_start_idx = 0
         num_alignments_tried = 0
 
-        while alignment_start_idx <= (len(t) - len(self.p)):
+        # Compare through bytes (int vs int, no per-char str allocation) and
+        # bind hot attributes as locals (LOAD_FAST instead of LOAD_ATTR).
+        p_b = self.p_b
+        p_bm = self.p_bm
+        bc_tab = self._bc
+        gs_tab = self._gs
+        t_b = t.encode('ascii')
+        p_len = len(p_b)
+        t_len = len(t_b)
+
+        while alignment_start_idx <= (t_len - p_len):
             num_alignments_tried += 1
             shift = 1
             match = True
             # Check from right to left
-            for j in range(len(self.p) - 1, -1, -1):
+            for j in range(p_len - 1, -1, -1):
                 num_char_comparisons += 1
                 k = alignment_start_idx + j
-                if self.p[j] != t[k]:
+                if p_b[j] != t_b[k]:
                     match = False
-                    bad_char_shift = self.p_bm.bad_character_rule(j, t[k])
-                    good_suffix_shift = self.p_bm.good_suffix_rule(j)
+                    bad_char_shift = int(bc_tab[j, t_b[k]])
+                    good_suffix_shift = int(gs_tab[j])
                     shift = max(bad_char_shift, good_suffix_shift, shift)
-                    if shift > 1:
+                    if self.track_skips and shift > 1:
+                        # (skipped, bad-char contribution, good-suffix contribution)
                         skipped_alignments.append(
-                            {
-                                'shift': shift - 1,
-                                'bad_char_shift':  bad_char_shift - 1 if bad_char_shift > 0 else 0,
-                                'good_suffix_shift': good_suffix_shift - 1 if good_suffix_shift > 0 else 0
-                            }
+                            (
+                                shift - 1,
+                                bad_char_shift - 1 if bad_char_shift > 0 else 0,
+                                good_suffix_shift - 1 if good_suffix_shift > 0 else 0
+                            )
                         )
                     break
 
             if match:
                 occurrences.append(alignment_start_idx)
-                skip_gs = self.p_bm.match_skip()
+                skip_gs = p_bm.match_skip()
                 shift = max(shift, skip_gs)
             alignment_start_idx += shift
         return occurrences, num_alignments_tried, num_char_comparisons
 
 
+# 2-bit encoding of the ACGT alphabet, indexed by character ordinal
+_SUBSEQ_ENC = np.zeros(256, dtype=np.int64)
+_SUBSEQ_ENC[ord('C')] = 1
+_SUBSEQ_ENC[ord('G')] = 2
+_SUBSEQ_ENC[ord('T')] = 3
+
+
+def _pack_subseq_keys(t_arr, k, ival, enc):
+    """ Pack every k-character subsequence (spaced ival apart) of t_arr into
+        a 64-bit integer key, 2 bits per base.
+
+        sliding_window_view exposes all span-length windows of the text as an
+        O(1)-memory strided matrix; taking every ival-th column and a dot
+        product against the 2-bit place values packs all keys in one
+        vectorized pass, with no per-subseq Python slicing. """
+    span = 1 + ival * (k - 1)
+    if len(t_arr) < span:
+        return np.empty(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(t_arr, span)[:, ::ival]
+    place_values = np.left_shift(1, 2 * np.arange(k - 1, -1, -1, dtype=np.int64))
+    return enc[windows].dot(place_values)
+
+
 class SubseqIndex(ExactMatchingStrategy):
     """ Holds a subsequence index for a text T """
 
@@ -77,23 +142,43 @@ class SubseqIndex(ExactMatchingStrategy):
         self.t = t
         self.k = k  # num characters per subsequence extracted
         self.ival = ival  # space between them; 1=adjacent, 2=every other, etc
-        self.index = []
+        self.index = defaultdict(list)  # multimap: subseq key -> offsets (in order)
         self.span = 1 + ival * (k - 1)
-        for i in range(len(t) - self.span + 1):  # for each subseq
-            self.index.append((t[i:i + self.span:ival], i))  # add (subseq, offset)
-        self.index.sort()  # alphabetize by subseq
+        # For ACGT text, pack each subseq into a 64-bit int (2 bits per base):
+        # int keys hash faster than fresh str objects and take ~8x less memory.
+        # k is capped at 31 so 2k bits stay within the signed int64 keys.
+        self.packed = k <= 31 and set(t) <= set('ACGT')
+        if self.packed:
+            keys = _pack_subseq_keys(_to_uint8(t), k, ival, _SUBSEQ_ENC)
+            for i, key in enumerate(keys.tolist()):
+                self.index[key].append(i)
+        else:
+            for i in range(len(t) - self.span + 1):  # for each subseq
+                self.index[t[i:i + self.span:ival]].append(i)  # add offset under its subseq
+
+    def _key(self, subseq: str):
+        """ Return the index key for a subseq: packed int for ACGT, else str.
+
+            Query subseqs that are shorter than k or contain non-ACGT
+            characters can never equal an indexed subsequence, but their
+            packed encoding would alias one (implicit leading 'A's; unknown
+            characters encode as 'A'). Return None for those so the lookup
+            misses, exactly as the string keys would. """
+        if not self.packed:
+            return subseq
+        if len(subseq) != self.k:
+            return None
+        key = 0
+        for c in subseq:
+            if c not in 'ACGT':
+                return None
+            key = (key << 2) | int(_SUBSEQ_ENC[ord(c)])
+        return key
 
     def get_hits(self, p):
         """ Return index hits for first subseq of p """
         subseq = p[:self.span:self.ival]  # query with first subseq
-        i = bisect.bisect_left(self.index, (subseq, -1))  # binary search
-        hits = []
-        while i < len(self.index):  # collect matching index entries
-            if self.index[i][0] != subseq:
-                break
-            hits.append(self.index[i][1])
-            i += 1
-        return hits
+        return self.index.get(self._key(subseq), [])  # O(1) multimap lookup
 
     def get_occurrences(self, p: str, **kwargs):
         # k = self.k
@@ -106,79 +191,222 @@ class SubseqIndex(ExactMatchingStrategy):
         # return sorted(offsets)
 
 
+def _to_uint8(s: str) -> np.ndarray:
+    """ View a string as a uint8 array so numba kernels can compare bytes. """
+    return np.frombuffer(s.encode('ascii'), dtype=np.uint8)
+
+
+def _verify_partition(p_arr, t_arr, match, partition_start, m) -> bool:
+    """ Hamming-compare the whole of p against t aligned at
+        match - partition_start and check the mismatch budget. The partition
+        window starting at partition_start is a known exact match and
+        contributes zero mismatches, so one vectorized whole-pattern compare
+        replaces the two loops over the flanks; on typical read lengths a
+        single C-level count_nonzero beats early-exit per-character loops. """
+    offset = match - partition_start
+    window = t_arr[offset:offset + len(p_arr)]
+    # Exact-match fast path: a memoryview equality check is a single memcmp,
+    # cheaper than materializing the mismatch mask when the window matches.
+    if memoryview(p_arr) == memoryview(window):
+        return True
+    return np.count_nonzero(p_arr != window) <= m
+
+
+@njit(cache=True)
+def _verify_full(p_arr, t_arr, offset, m) -> bool:
+    """ Count mismatches of all of p against t aligned at offset; early-exit once > m. """
+    mismatches = 0
+    for j in range(0, len(p_arr)):
+        if p_arr[j] != t_arr[offset + j]:
+            mismatches += 1
+            if mismatches > m:
+                return False
+    return True
+
+
+@njit(cache=True, nogil=True)
+def _bmh_find_all(p_arr, t_arr):
+    """ Boyer-Moore-Horspool exact search compiled to native code. Only the
+        bad-character shift table is needed for the short patterns used as
+        pigeonhole partitions; the compiled kernel is cached on disk and
+        reused across queries. Returns all (overlapping) occurrences. """
+    p_len = len(p_arr)
+    t_len = len(t_arr)
+    occurrences = [0]
+    occurrences.pop()
+    if p_len == 0 or t_len < p_len:
+        return occurrences
+    shift = np.full(256, p_len, dtype=np.int64)
+    for j in range(p_len - 1):
+        shift[p_arr[j]] = p_len - 1 - j
+    i = 0
+    while i <= t_len - p_len:
+        j = p_len - 1
+        while j >= 0 and p_arr[j] == t_arr[i + j]:
+            j -= 1
+        if j < 0:
+            occurrences.append(i)
+        i += shift[t_arr[i + p_len - 1]]
+    return occurrences
+
+
+@njit(cache=True, nogil=True)
+def _pigeonhole_match(p_arr, t_arr, m):
+    """ Fused pigeonhole pipeline in native code: scan each of the m + 1
+        partitions over t and verify candidates by bounded Hamming distance,
+        all inside one compiled kernel. Returns (occurrence offsets with
+        duplicates, total partition hits). """
+    p_len = len(p_arr)
+    t_len = len(t_arr)
+    partition_length = int(round(p_len / (m + 1)))
+    total_hits = 0
+    occurrences = [0]
+    occurrences.pop()
+    for i in range(m + 1):
+        partition_start = i * partition_length
+        partition_end = min(partition_start + partition_length, p_len)
+        if partition_end <= partition_start:
+            break
+        for match in _bmh_find_all(p_arr[partition_start:partition_end], t_arr):
+            total_hits += 1
+            if match < partition_start or (match - partition_start + p_len) > t_len:
+                continue
+            offset = match - partition_start
+            mismatches = 0
+            within_budget = True
+            for j in range(0, partition_start):
+                if p_arr[j] != t_arr[offset + j]:
+                    mismatches += 1
+                    if mismatches > m:
+                        within_budget = False
+                        break
+            if within_budget:
+                for j in range(partition_end, p_len):
+                    if p_arr[j] != t_arr[offset + j]:
+                        mismatches += 1
+                        if mismatches > m:
+                            within_budget = False
+                            break
+            if within_budget:
+                occurrences.append(offset)
+    return occurrences, total_hits
+
+
+@lru_cache(maxsize=8)
+def _build_subseq_index(t: str, k: int, ival: int) -> SubseqIndex:
+    """ Cached SubseqIndex factory: querying many patterns against the same
+        genome (the typical read-alignment loop) builds the index once. """
+    return SubseqIndex(t, k=k, ival=ival)
+
+
 class PigeonHoleApproximateMatching:
 
     @staticmethod
     def query_bm(p: str, t: str, m: int, alphabet='ACGT'):
-        partition_length = int(round(len(p) / (m + 1)))
-        occurrences = set()
+        # An empty pattern matches nothing, for any m (str.find would report
+        # a hit at every position).
+        if not p:
+            return [], 0
+
+        if m == 0:
+            # Degenerate case: the single partition is p itself, so every hit
+            # is an exact occurrence and verification is a no-op. Answer with
+            # one str.find scan and skip the pigeonhole machinery entirely.
+            occurrences = _find_all(p, t)
+            return occurrences, len(occurrences)
+
+        p_len = len(p)
+        t_len = len(t)
+        partition_length = int(round(p_len / (m + 1)))
+        occurrences = []
         total_hits = 0
+        p_arr = _to_uint8(p)
+        t_arr = _to_uint8(t)
+        # Search all m + 1 partitions in a single pass over t: build an
+        # Aho-Corasick automaton of the partition strings instead of running
+        # m + 1 independent scans of the full text. Duplicate partition
+        # strings share an automaton word, so each word maps to the list of
+        # partitions it stands for.
+        partitions = defaultdict(list)
         for i in range(m + 1):
             partition_start = i * partition_length
-            partition_end = min(partition_start + partition_length, len(p))
-            sub_p = p[partition_start:partition_end]
-            if not sub_p:
+            partition_end = min(partition_start + partition_length, p_len)
+            if partition_end <= partition_start:
                 break
+            partitions[p[partition_start:partition_end]].append((partition_start, partition_end))
 
-            matcher = BoyerMooreExact(p=sub_p, alphabet=alphabet)
-            occurrences_ = matcher.get_occurrences(p=sub_p, alphabet=alphabet, t=t)
-            # bm = BoyerMooreExact(sub_p, alphabet=alphabet)
-            # occurrences_, alignments_tried_, num_comparisons_ = bm.query(t)
+        # No partitions (partition_length rounds to 0 for tiny p): nothing
+        # can match, and make_automaton() on an empty trie is not usable.
+        if not partitions:
+            return [], 0
 
-            # For any exact matches found, perform a validation step. Look around the exact match,
-            # and see if the text matches (allowing a certain number of mismatches). If the text
-            # matches within a certain number of mismatches, we have found a match
-            for match in occurrences_:
+        automaton = ahocorasick.Automaton()
+        for sub_p, spans in partitions.items():
+            automaton.add_word(sub_p, (len(sub_p), spans))
+        automaton.make_automaton()
+
+        # For any exact matches found, perform a validation step. Look around the exact match,
+        # and see if the text matches (allowing a certain number of mismatches). If the text
+        # matches within a certain number of mismatches, we have found a match
+        for end_idx, (word_length, spans) in automaton.iter(t):
+            match = end_idx - word_length + 1
+            for partition_start, partition_end in spans:
                 total_hits += 1
                 # This match occurs outside of the range of this partition, once aligned with t
-                if match < partition_start or (match - partition_start + len(p)) > len(t):
+                if match < partition_start or (match - partition_start + p_len) > t_len:
                     continue
-                else:
-                    mismatches = 0
-
-                    # Test the part of p before the partition we already compared above
-                    for j in range(0, partition_start):
-                        if p[j] != t[match - partition_start + j]:
-                            mismatches += 1
-                            if mismatches > m:
-                                break
-                    # Compare section after the segment already tested
-                    for j in range(partition_end, len(p)):
-                        if p[j] != t[match - partition_start + j]:
-                            mismatches += 1
-                            if mismatches > m:
-                                break
-
-                    if mismatches <= m:
-                        occurrences.add(match - partition_start)
-        return sorted(occurrences), total_hits
+                elif _verify_partition(p_arr, t_arr, match, partition_start, m):
+                    occurrences.append(match - partition_start)
+        # Sorted-unique in C: np.unique sorts and dedups in one pass, without
+        # a Python hash table or object comparisons
+        return np.unique(np.asarray(occurrences, dtype=np.int64)).tolist(), total_hits
+
+    @staticmethod
+    def query_bm_fast(p: str, t: str, m: int, **kwargs):
+        """ Same contract as query_bm, but the whole partition-search +
+            verify pipeline runs inside one compiled numba kernel (compiled
+            once per argument types and cached on disk). """
+        occurrences, total_hits = _pigeonhole_match(_to_uint8(p), _to_uint8(t), m)
+        return np.unique(np.asarray(occurrences, dtype=np.int64)).tolist(), total_hits
+
+    @staticmethod
+    def query_bm_batch(patterns: List[str], t: str, m: int, max_workers: Optional[int] = None):
+        """ Query a batch of patterns against the same text across threads.
+
+            The fused kernel is compiled with nogil=True, so worker threads
+            run genuinely in parallel over the shared read-only text buffer
+            (no per-process copies). Returns one (occurrences, total_hits)
+            pair per pattern, in input order. """
+        t_arr = _to_uint8(t)
+
+        def query_one(p: str):
+            occurrences, total_hits = _pigeonhole_match(_to_uint8(p), t_arr, m)
+            return np.unique(np.asarray(occurrences, dtype=np.int64)).tolist(), total_hits
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(query_one, patterns))
 
     @staticmethod
     def query_subseq_index(p: str, t: str, m: int, ival: int = 1, k: Optional[int] = None):
+        p_len = len(p)
+        t_len = len(t)
         if not k:
-            k = max(int(round(len(p) / (m + 1))), int(len(p)/2))
+            k = max(int(round(p_len / (m + 1))), int(p_len / 2))
 
-        all_matches = set()
-        p_idx = SubseqIndex(t, k=k, ival=ival)
+        all_matches = []
+        p_idx = _build_subseq_index(t, k, ival)
         idx_hits = 0
+        p_arr = _to_uint8(p)
+        t_arr = _to_uint8(t)
         for i in range(m + 1):
             start = i
             matches = p_idx.get_occurrences(p[start:])
 
             # Extend matching segments to see if whole p matches
-            for m in matches:
+            for match_off in matches:
                 idx_hits += 1
-                if m < start or m - start + len(p) > len(t):
+                if match_off < start or match_off - start + p_len > t_len:
                     continue
-                else:
-                    mismatches = 0
-
-                    for j in range(0, len(p)):
-                        if p[j] != t[m - start + j]:
-                            mismatches += 1
-                            if mismatches > m:
-                                break
-
-                    if mismatches <= m:
-                        all_matches.add(m - start)
-        return sorted(all_matches), idx_hits
+                elif _verify_full(p_arr, t_arr, match_off - start, m):
+                    all_matches.append(match_off - start)
+        return np.unique(np.asarray(all_matches, dtype=np.int64)).tolist(), idx_hits
@@ -162,6 +162,37 @@ class TestApproximateBoyerMoore(TestCase):
         self.assertEqual(matches, [0, 5])
 
 
+class TestApproximateBoyerMooreFast(TestCase):
+    def test_approximate_query_bm_fast1(self):
+        p = 'AACTTG'
+        t = 'CACTTAATTTG'
+        matches, num_index_hits = PigeonHoleApproximateMatching().query_bm_fast(p=p, t=t, m=2)
+        self.assertEqual(matches, [0, 5])
+
+    def test_exact_query_bm_fast2(self):
+        p = 'TCTA'
+        t = 'GCTACGATCTAGAATCTA'
+        matches, num_index_hits = PigeonHoleApproximateMatching().query_bm_fast(t=t, m=0, p=p)
+        self.assertEqual(matches, [7, 14])
+
+    def test_query_bm_batch(self):
+        t = 'CACTTAATTTG'
+        patterns = ['AACTTG', 'ACTTAA', 'TTTG']
+        results = PigeonHoleApproximateMatching().query_bm_batch(patterns, t=t, m=2)
+        for p, (matches, num_index_hits) in zip(patterns, results):
+            expected_matches, expected_hits = PigeonHoleApproximateMatching().query_bm_fast(p=p, t=t, m=2)
+            self.assertEqual(matches, expected_matches)
+            self.assertEqual(num_index_hits, expected_hits)
+
+    def test_query_bm_fast_parity(self):
+        p = 'AACTTG'
+        t = 'CACTTAATTTG'
+        matches, num_index_hits = PigeonHoleApproximateMatching().query_bm(p=p, t=t, m=2)
+        fast_matches, fast_num_index_hits = PigeonHoleApproximateMatching().query_bm_fast(p=p, t=t, m=2)
+        self.assertEqual(matches, fast_matches)
+        self.assertEqual(num_index_hits, fast_num_index_hits)
+
+
 class TestApproximateSubSeqIndex(TestCase):
     def test_approximate_subseq_index1(self):
         p = 'AACTTG'